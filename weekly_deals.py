@@ -1,16 +1,27 @@
 import argparse
 import csv
-import json
 import re
+import operator
 import os
+import string
+import threading
 import time
-from dataclasses import dataclass, asdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, fields
 from datetime import datetime, timedelta, timezone
-from typing import List
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterator, List, Optional, Set
 
 import requests
+from requests.adapters import HTTPAdapter
+from requests_cache import DO_NOT_CACHE, CachedSession
+import urllib3
+from urllib3.util import Retry
 from dateutil.parser import isoparse
 import feedparser
+import ahocorasick
+import orjson
+from lxml import etree
 
 
 # -------------------------
@@ -30,6 +41,16 @@ DEAL_TERMS = [
     "sale-leaseback", "strategic partnership", "joint venture",
 ]
 
+# Deal-type labels, checked in this order; first label with a hit wins
+DEAL_TYPE_TERMS = {
+    "M&A": ["acquire", "acquired", "acquisition", "merger", "sold to", "purchase agreement"],
+    "Capital Raise": ["raises", "raised", "funding", "series", "private placement", "pipe"],
+    "Debt": ["credit facility", "term loan", "notes", "convertible", "secured", "debt", "debenture"],
+}
+
+# Loose cannabis stems (EDGAR filing hint, Bing relevance gate)
+CANNABIS_HINT_TERMS = ["cannab", "marij", "hemp", "dispens", "thc", "cbd"]
+
 # EDGAR RSS feeds (recent filings) - disabled in main() for now
 EDGAR_RSS = [
     "https://www.sec.gov/cgi-bin/browse-edgar?action=getcurrent&CIK=&type=8-K&company=&dateb=&owner=include&start=0&count=100&output=atom",
@@ -47,8 +68,22 @@ BING_ENDPOINT = "https://api.bing.microsoft.com/v7.0/news/search"
 
 USER_AGENT = "ViridianWeeklyDealsBot/0.1 (contact: research@yourdomain.com)"
 
+# On-disk HTTP cache (sqlite, next to this script); re-runs within the TTL reuse earlier responses
+HTTP_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "http_cache")
+HTTP_CACHE_TTL = 3600
+# EDGAR "getcurrent" feeds are live listings, so always fetch them fresh
+HTTP_CACHE_URL_TTLS = {
+    "www.sec.gov/cgi-bin/browse-edgar": DO_NOT_CACHE,
+}
+
+# Results per Bing query; 100 is the News Search API maximum, so one call per query suffices
+BING_COUNT = 100
+
+# Minimum spacing between Bing request starts (be polite to the API)
+BING_MIN_INTERVAL = 0.35
+
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class DealItem:
     source: str
     source_type: str          # "edgar" or "news"
@@ -61,6 +96,11 @@ class DealItem:
     snippet: str              # short evidence snippet
 
 
+DEAL_FIELDS = tuple(f.name for f in fields(DealItem))
+# DealItem -> tuple of field values, in DEAL_FIELDS order
+item_row = operator.attrgetter(*DEAL_FIELDS)
+
+
 def iso_now() -> datetime:
     return datetime.now(timezone.utc)
 
@@ -69,34 +109,109 @@ def within_days(dt: datetime, days: int) -> bool:
     return dt >= (iso_now() - timedelta(days=days))
 
 
+# ISO8601 timestamp -> tz-aware datetime (naive = UTC), or None if unparseable.
+# datetime.fromisoformat is C and handles EDGAR/Bing stamps (incl. "Z" and 7-digit
+# fractions) on 3.11+; dateutil's pure-Python isoparse only sees the leftovers
+def parse_iso_ts(s: str) -> Optional[datetime]:
+    # API payloads are untyped; a non-string value must not escape as TypeError
+    if not isinstance(s, str):
+        return None
+    try:
+        dt = datetime.fromisoformat(s)
+    except ValueError:
+        try:
+            dt = isoparse(s)
+        except (ValueError, OverflowError):
+            return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+# All published_at values are UTC ISO8601, so they sort correctly as plain strings
+def to_utc_iso(dt: datetime) -> str:
+    return dt.astimezone(timezone.utc).isoformat()
+
+
+# Title dedupe key: strip a trailing " - Publisher" / " | Publisher" segment (syndicated
+# copies), lowercase, drop non-ASCII, then delete every byte outside [a-z0-9].
+# Segments with digits or "$" are kept so "... - $5M deal" style tails still count, and
+# short heads ("Tilray - Aphria merger closes") are left whole.
+_PUBLISHER_SUFFIX_RE = re.compile(r"\s+[-|\u2013\u2014]\s+[^-|\u2013\u2014$0-9]{1,40}$")
+_KEEP_BYTES = (string.ascii_lowercase + string.digits).encode()
+_DROP_BYTES = bytes(b for b in range(256) if b not in _KEEP_BYTES)
+
+
 def clean_text(s: str) -> str:
-    return re.sub(r"\s+", " ", (s or "").strip())
+    # str.split() with no separator collapses the same Unicode whitespace as \s+ and trims the ends
+    return " ".join(s.split()) if s else ""
 
 
-def guess_deal_type(text: str) -> str:
-    t = (text or "").lower()
-    if any(k in t for k in ["acquire", "acquired", "acquisition", "merger", "sold to", "purchase agreement"]):
-        return "M&A"
-    if any(k in t for k in ["raises", "raised", "funding", "series", "private placement", "pipe"]):
-        return "Capital Raise"
-    if any(k in t for k in ["credit facility", "term loan", "notes", "convertible", "secured", "debt", "debenture"]):
-        return "Debt"
+def title_key(title: str) -> bytes:
+    t = title or ""
+    m = _PUBLISHER_SUFFIX_RE.search(t)
+    if m and len(t[:m.start()].split()) >= 4:
+        t = t[:m.start()]
+    return t.lower().encode("ascii", "ignore").translate(None, _DROP_BYTES)
+
+
+# Keyword automaton: each term maps to the categories it signals, so a single
+# pass over the lowercased text collects every category hit (overlaps included)
+def build_automaton(categories: Dict[str, List[str]]) -> ahocorasick.Automaton:
+    term_cats: Dict[str, Set[str]] = {}
+    for cat, terms in categories.items():
+        for k in terms:
+            term_cats.setdefault(k.lower(), set()).add(cat)
+    automaton = ahocorasick.Automaton()
+    for term, cats in term_cats.items():
+        automaton.add_word(term, frozenset(cats))
+    automaton.make_automaton()
+    return automaton
+
+
+KEYWORDS = build_automaton({
+    "cannabis": CANNABIS_TERMS,
+    "cannabis_hint": CANNABIS_HINT_TERMS,
+    "deal": DEAL_TERMS,
+    **DEAL_TYPE_TERMS,
+})
+
+
+# The *_lc helpers expect text that the caller has already lowercased once
+@lru_cache(maxsize=4096)
+def keyword_hits(text_lc: str) -> FrozenSet[str]:
+    hits: Set[str] = set()
+    for _, cats in KEYWORDS.iter(text_lc):
+        hits |= cats
+    return frozenset(hits)
+
+
+def deal_type_from_hits(hits: FrozenSet[str]) -> str:
+    for label in DEAL_TYPE_TERMS:
+        if label in hits:
+            return label
     return "Other"
 
 
+def guess_deal_type_lc(text_lc: str) -> str:
+    return deal_type_from_hits(keyword_hits(text_lc))
+
+
+# Single numeric branch (no alternation to retry); a scale word must end at a word boundary
 AMOUNT_RE = re.compile(
-    r"(\$|USD\s?)\s?([0-9]{1,3}(?:,[0-9]{3})*(?:\.[0-9]+)?|[0-9]+(?:\.[0-9]+)?)\s?(million|billion|m|bn)?",
+    r"(?:\$|USD\s?)\s?([0-9]+(?:,[0-9]{3})*(?:\.[0-9]+)?)\s?(?:(million|billion|bn|m)\b)?",
     re.IGNORECASE
 )
 
 
+@lru_cache(maxsize=4096)
 def guess_amount(text: str) -> str:
     m = AMOUNT_RE.search(text or "")
     if not m:
         return ""
     prefix = "$"
-    num = m.group(2)
-    scale = (m.group(3) or "").lower()
+    num = m.group(1)
+    scale = (m.group(2) or "").lower()
     if scale in ["million", "m"]:
         return f"{prefix}{num}M"
     if scale in ["billion", "bn"]:
@@ -104,6 +219,7 @@ def guess_amount(text: str) -> str:
     return f"{prefix}{num}"
 
 
+@lru_cache(maxsize=4096)
 def guess_entities_from_title(title: str) -> str:
     t = title or ""
     splits = [" acquires ", " acquisition of ", " to acquire ", " to be acquired by ", " merger with ", " raises ", " secures "]
@@ -117,64 +233,151 @@ def guess_entities_from_title(title: str) -> str:
     return clean_text(t)[:200]
 
 
-def contains_keywords(text: str, required_any: List[str], deal_any: List[str]) -> bool:
-    low = (text or "").lower()
-    return any(k.lower() in low for k in required_any) and any(k.lower() in low for k in deal_any)
+def contains_keywords_lc(text_lc: str) -> bool:
+    hits = keyword_hits(text_lc)
+    return "cannabis" in hits and "deal" in hits
+
+
+def has_cannabis_lc(text_lc: str) -> bool:
+    hits = keyword_hits(text_lc)
+    return "cannabis" in hits or "cannabis_hint" in hits
+
+
+# -------------------------
+# HTTP
+# -------------------------
+
+# Shared session: sqlite response cache, pooled keep-alive connections,
+# retries on throttling/gateway errors
+def make_session() -> requests.Session:
+    retry = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 502, 503], raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=retry)
+    session = CachedSession(
+        HTTP_CACHE_PATH,
+        backend="sqlite",
+        expire_after=HTTP_CACHE_TTL,
+        urls_expire_after=HTTP_CACHE_URL_TTLS,
+        allowable_methods=("GET",),
+        # Keep API keys out of cache keys and out of the stored requests
+        ignored_parameters=("Authorization", "Ocp-Apim-Subscription-Key"),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+# Built on first use (not at import) so importing the module leaves no cache file behind;
+# the lock keeps concurrent fetchers from racing to create two sessions
+def get_session() -> requests.Session:
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = make_session()
+        return _session
+
+
+# Spaces out call starts by at least `interval` seconds across threads
+class Throttle:
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_at = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            delay = max(0.0, self._next_at - now)
+            self._next_at = max(now, self._next_at) + self.interval
+        if delay:
+            time.sleep(delay)
 
 
 # -------------------------
 # EDGAR fetch (kept, but disabled in main for now)
 # -------------------------
 
+ATOM_NS = "{http://www.w3.org/2005/Atom}"
+ATOM_ENTRY = f"{ATOM_NS}entry"
+
+
+# Streams <entry> elements as plain dicts, freeing each one once it is read
+def iter_atom_entries(source) -> Iterator[Dict[str, str]]:
+    try:
+        for _, elem in etree.iterparse(source, events=("end",), tag=ATOM_ENTRY):
+            link_el = elem.find(f"{ATOM_NS}link[@rel='alternate']")
+            if link_el is None:
+                link_el = elem.find(f"{ATOM_NS}link")
+            yield {
+                "title": elem.findtext(f"{ATOM_NS}title") or "",
+                "link": link_el.get("href", "") if link_el is not None else "",
+                "published": elem.findtext(f"{ATOM_NS}published") or "",
+                "updated": elem.findtext(f"{ATOM_NS}updated") or "",
+                "summary": elem.findtext(f"{ATOM_NS}summary") or "",
+            }
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+    except (etree.XMLSyntaxError, OSError, urllib3.exceptions.HTTPError):
+        # Malformed feed or dropped connection: keep what was already yielded
+        return
+
+
 def fetch_edgar(days: int) -> List[DealItem]:
     out: List[DealItem] = []
-    headers = {"User-Agent": USER_AGENT, "Accept-Encoding": "gzip, deflate"}
+    headers = {"Accept-Encoding": "gzip, deflate"}
 
     for feed_url in EDGAR_RSS:
         try:
-            r = requests.get(feed_url, headers=headers, timeout=30)
-            r.raise_for_status()
-            parsed = feedparser.parse(r.text)
+            r = get_session().get(feed_url, headers=headers, timeout=30, stream=True)
         except Exception:
             continue
 
-        for e in parsed.entries:
-            pub_raw = getattr(e, "published", None) or getattr(e, "updated", None)
-            if not pub_raw:
-                continue
-            try:
-                pub_dt = isoparse(pub_raw)
-            except Exception:
-                continue
-
-            if pub_dt.tzinfo is None:
-                pub_dt = pub_dt.replace(tzinfo=timezone.utc)
-            if not within_days(pub_dt, days):
+        # Enter the with-block first so error responses also release their pooled connection
+        with r:
+            if not r.ok:
                 continue
+            # Parse straight off the socket, gunzipping on the fly; no full-body copy
+            r.raw.decode_content = True
+            for e in iter_atom_entries(r.raw):
+                pub_raw = e["published"] or e["updated"]
+                if not pub_raw:
+                    continue
+                pub_dt = parse_iso_ts(pub_raw)
+                if pub_dt is None:
+                    continue
+                if not within_days(pub_dt, days):
+                    continue
 
-            title = clean_text(getattr(e, "title", "") or "")
-            link = getattr(e, "link", "") or ""
-            summary = clean_text(getattr(e, "summary", "") or "")
+                title = clean_text(e["title"])
+                link = e["link"]
+                summary = clean_text(e["summary"])
 
-            blob = f"{title} {summary}"
+                blob = f"{title} {summary}"
+                blob_lc = blob.lower()
 
-            has_deal = any(k.lower() in blob.lower() for k in DEAL_TERMS)
-            has_cannabis_hint = re.search(r"(cannab|marij|hemp|dispens|thc|cbd)", blob.lower()) is not None
+                hits = keyword_hits(blob_lc)
+                has_deal = "deal" in hits
+                has_cannabis_hint = "cannabis_hint" in hits
 
-            if not has_deal and not has_cannabis_hint:
-                continue
+                if not has_deal and not has_cannabis_hint:
+                    continue
 
-            out.append(DealItem(
-                source="SEC EDGAR",
-                source_type="edgar",
-                published_at=pub_dt.isoformat(),
-                title=title,
-                url=link,
-                deal_type_guess=guess_deal_type(blob),
-                entities_guess=guess_entities_from_title(title),
-                amount_guess=guess_amount(blob),
-                snippet=summary[:280],
-            ))
+                out.append(DealItem(
+                    source="SEC EDGAR",
+                    source_type="edgar",
+                    published_at=to_utc_iso(pub_dt),
+                    title=title,
+                    url=link,
+                    deal_type_guess=deal_type_from_hits(hits),
+                    entities_guess=guess_entities_from_title(title),
+                    amount_guess=guess_amount(blob),
+                    snippet=summary[:280],
+                ))
 
     return out
 
@@ -198,17 +401,14 @@ def bing_query(days: int) -> List[DealItem]:
 
     since_dt = iso_now() - timedelta(days=days)
 
-    headers = {
-        "Ocp-Apim-Subscription-Key": key,
-        "User-Agent": USER_AGENT,
-    }
+    headers = {"Ocp-Apim-Subscription-Key": key}
 
-    out: List[DealItem] = []
+    throttle = Throttle(BING_MIN_INTERVAL)
 
-    for q in queries:
+    def _fetch_one(q: str) -> List[DealItem]:
         params = {
             "q": q,
-            "count": 50,
+            "count": BING_COUNT,
             "freshness": "Week",
             "sortBy": "Date",
             "textFormat": "Raw",
@@ -216,50 +416,61 @@ def bing_query(days: int) -> List[DealItem]:
         }
 
         try:
-            r = requests.get(BING_ENDPOINT, headers=headers, params=params, timeout=30)
+            session = get_session()
+            # Serve from the cache when possible; only real network calls are throttled.
+            # A cache miss under only_if_cached comes back as a synthetic 504.
+            r = session.get(BING_ENDPOINT, headers=headers, params=params, timeout=30, only_if_cached=True)
+            if r.status_code == 504:
+                throttle.wait()
+                r = session.get(BING_ENDPOINT, headers=headers, params=params, timeout=30)
             print("Bing status:", r.status_code)
             if r.status_code != 200:
                 # Helpful for debugging authentication issues
                 print("Bing error (first 200 chars):", (r.text or "")[:200])
-                continue
+                return []
 
-            data = r.json()
+            data = orjson.loads(r.content)
         except Exception:
-            continue
+            return []
 
+        found: List[DealItem] = []
         for a in data.get("value", []) or []:
             title = clean_text(a.get("name", ""))
             url = a.get("url", "") or ""
             desc = clean_text(a.get("description", ""))
 
-            date_raw = a.get("datePublished", "") or ""
-            pub_iso = iso_now().isoformat()
-            try:
-                pub_dt = isoparse(date_raw) if date_raw else iso_now()
-                if pub_dt.tzinfo is None:
-                    pub_dt = pub_dt.replace(tzinfo=timezone.utc)
-                pub_iso = pub_dt.isoformat()
-                if pub_dt < since_dt:
-                    continue
-            except Exception:
-                pass
-
+            # Bing already matched the deal terms server-side (possibly in the article
+            # body), so only drop results whose title/description never mention cannabis
             blob = f"{title} {desc}"
+            blob_lc = blob.lower()
+            if not has_cannabis_lc(blob_lc):
+                continue
 
-            out.append(DealItem(
+            date_raw = a.get("datePublished", "") or ""
+            pub_dt = parse_iso_ts(date_raw) if date_raw else None
+            if pub_dt is not None and pub_dt < since_dt:
+                continue
+            # Missing or unparseable dates are kept and stamped with the fetch time
+            pub_iso = to_utc_iso(pub_dt or iso_now())
+
+            found.append(DealItem(
                 source="Bing News",
                 source_type="news",
                 published_at=pub_iso,
                 title=title,
                 url=url,
-                deal_type_guess=guess_deal_type(blob),
+                deal_type_guess=guess_deal_type_lc(blob_lc),
                 entities_guess=guess_entities_from_title(title),
                 amount_guess=guess_amount(blob),
                 snippet=desc[:280],
             ))
+        return found
 
-        time.sleep(0.35)  # be polite to the API
+    # Queries are I/O bound; run them concurrently and keep query order in the output
+    with ThreadPoolExecutor(max_workers=len(queries)) as executor:
+        results = list(executor.map(_fetch_one, queries))
 
+    out: List[DealItem] = [it for found in results for it in found]
     return dedupe(out)
 
 
@@ -270,17 +481,20 @@ def bing_query(days: int) -> List[DealItem]:
 def fetch_rss(days: int) -> List[DealItem]:
     out: List[DealItem] = []
     for feed_url in NEWS_RSS:
-        parsed = feedparser.parse(feed_url)
+        try:
+            r = get_session().get(feed_url, timeout=30)
+            r.raise_for_status()
+            parsed = feedparser.parse(r.content)
+        except Exception:
+            continue
+
         for e in parsed.entries:
             pub_raw = getattr(e, "published", None) or getattr(e, "updated", None)
             if not pub_raw:
                 continue
-            try:
-                pub_dt = isoparse(pub_raw)
-            except Exception:
+            pub_dt = parse_iso_ts(pub_raw)
+            if pub_dt is None:
                 continue
-            if pub_dt.tzinfo is None:
-                pub_dt = pub_dt.replace(tzinfo=timezone.utc)
             if not within_days(pub_dt, days):
                 continue
 
@@ -289,16 +503,17 @@ def fetch_rss(days: int) -> List[DealItem]:
             summary = clean_text(getattr(e, "summary", "") or "")
 
             blob = f"{title} {summary}"
-            if not contains_keywords(blob, CANNABIS_TERMS, DEAL_TERMS):
+            blob_lc = blob.lower()
+            if not contains_keywords_lc(blob_lc):
                 continue
 
             out.append(DealItem(
                 source=f"RSS ({feed_url})",
                 source_type="news",
-                published_at=pub_dt.isoformat(),
+                published_at=to_utc_iso(pub_dt),
                 title=title,
                 url=link,
-                deal_type_guess=guess_deal_type(blob),
+                deal_type_guess=guess_deal_type_lc(blob_lc),
                 entities_guess=guess_entities_from_title(title),
                 amount_guess=guess_amount(blob),
                 snippet=summary[:280],
@@ -311,38 +526,33 @@ def fetch_rss(days: int) -> List[DealItem]:
 # -------------------------
 
 def dedupe(items: List[DealItem]) -> List[DealItem]:
-    seen_url = set()
-    seen_title = set()
+    # URLs are str and title keys are bytes, so both share one set without colliding
+    seen = set()
     out: List[DealItem] = []
     for it in items:
         u = (it.url or "").strip()
-        t = re.sub(r"[^a-z0-9]+", "", (it.title or "").lower())
-        if u and u in seen_url:
-            continue
-        if t and t in seen_title:
+        t = title_key(it.title)
+        if (u and u in seen) or (t and t in seen):
             continue
         if u:
-            seen_url.add(u)
+            seen.add(u)
         if t:
-            seen_title.add(t)
+            seen.add(t)
         out.append(it)
     return out
 
 
 def write_csv(items: List[DealItem], path: str):
-    fieldnames = list(asdict(items[0]).keys()) if items else [
-        "source","source_type","published_at","title","url","deal_type_guess","entities_guess","amount_guess","snippet"
-    ]
     with open(path, "w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=fieldnames)
-        w.writeheader()
-        for it in items:
-            w.writerow(asdict(it))
+        w = csv.writer(f)
+        w.writerow(DEAL_FIELDS)
+        w.writerows(item_row(it) for it in items)
 
 
 def write_json(items: List[DealItem], path: str):
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump([asdict(x) for x in items], f, ensure_ascii=False, indent=2)
+    # orjson serializes dataclasses natively, straight to UTF-8 bytes
+    with open(path, "wb") as f:
+        f.write(orjson.dumps(items, option=orjson.OPT_INDENT_2))
 
 
 def main():
@@ -359,23 +569,22 @@ def main():
     print("EDGAR items:", len(edgar_items))
     items += edgar_items
 
-    news_items = bing_query(args.since)
+    # Sources are independent and I/O bound; fetch them concurrently on the shared session
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        bing_future = executor.submit(bing_query, args.since)
+        rss_future = executor.submit(fetch_rss, args.since)
+        news_items = bing_future.result()
+        rss_items = rss_future.result()
+
     print("Bing items:", len(news_items))
     items += news_items
 
-    rss_items = fetch_rss(args.since)
     print("RSS items:", len(rss_items))
     items += rss_items
 
     items = dedupe(items)
 
-    def parse_dt(x: str) -> datetime:
-        try:
-            return isoparse(x)
-        except Exception:
-            return datetime(1970, 1, 1, tzinfo=timezone.utc)
-
-    items.sort(key=lambda x: parse_dt(x.published_at), reverse=True)
+    items.sort(key=lambda x: x.published_at, reverse=True)
 
     write_csv(items, args.out)
     write_json(items, args.out_json)